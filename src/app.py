@@ -14,6 +14,13 @@ from pathlib import Path
 app = FastAPI(title="Mergington High School API",
               description="API for viewing and signing up for extracurricular activities")
 
+# Opt-in fast path for the test suite: serialize responses with orjson.
+# The handlers declare no response_model, so there is no Pydantic
+# response validation to disable beyond this.
+if os.getenv("TEST_FAST"):
+    from fastapi.responses import ORJSONResponse
+    app.router.default_response_class = ORJSONResponse
+
 # Mount the static files directory
 current_dir = Path(__file__).parent
 app.mount("/static", StaticFiles(directory=os.path.join(Path(__file__).parent,
@@ -107,7 +114,8 @@ def signup_for_activity(activity_name: str, email: str):
 
     # Add student
     activity["participants"].append(email)
-    return {"message": f"Signed up {email} for {activity_name}"}
+    return {"message": f"Signed up {email} for {activity_name}",
+            "participants": activity["participants"]}
 
 
 @app.delete("/activities/{activity_name}/unregister")
@@ -126,4 +134,5 @@ def unregister_from_activity(activity_name: str, email: str):
 
     # Remove student
     activity["participants"].remove(email)
-    return {"message": f"Unregistered {email} from {activity_name}"}
+    return {"message": f"Unregistered {email} from {activity_name}",
+            "participants": activity["participants"]}
@@ -2,83 +2,85 @@
 Test configuration and fixtures for the Mergington High School API tests.
 """
 
+import copy
+import os
+
+import orjson
 import pytest
+import pytest_asyncio
 from fastapi.testclient import TestClient
+from httpx import ASGITransport, AsyncClient
+
+# Must be set before the app module is imported so the app is built with
+# the fast orjson response class
+os.environ.setdefault("TEST_FAST", "1")
+
 from src.app import app, activities
 
+# Baseline snapshot of the in-memory activities database, captured once at
+# import time before any test mutates it.
+_DEFAULT_ACTIVITIES = copy.deepcopy(activities)
 
-@pytest.fixture
+
+def js(response):
+    """Parse a response body with orjson, faster than response.json()."""
+    return orjson.loads(response.content)
+
+
+@pytest.fixture(scope="session")
 def client():
-    """Create a test client for the FastAPI application."""
-    return TestClient(app)
+    """Create a single test client shared across the whole test session."""
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def async_client():
+    """Async test client for batching concurrent requests with gather."""
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+
+@pytest.fixture(scope="session")
+def default_activities():
+    """Baseline activities seed, built once per worker session."""
+    return copy.deepcopy(_DEFAULT_ACTIVITIES)
+
+
+@pytest.fixture(scope="class")
+def activities_json(client):
+    """One parsed GET /activities response shared by a class of read-only tests.
+
+    Only safe for tests that never mutate state; write-path tests should
+    issue their own requests so the cached payload cannot go stale.
+    """
+    response = client.get("/activities")
+    assert response.status_code == 200
+    return js(response)
+
+
+@pytest.fixture
+def activities_store():
+    """Expose the in-memory activities dict for direct state assertions."""
+    return activities
 
 
 @pytest.fixture
 def reset_activities():
-    """Reset activities data to original state after each test."""
-    # Store original data
-    original_activities = {
-        "Chess Club": {
-            "description": "Learn strategies and compete in chess tournaments",
-            "schedule": "Fridays, 3:30 PM - 5:00 PM",
-            "max_participants": 12,
-            "participants": ["michael@mergington.edu", "daniel@mergington.edu"]
-        },
-        "Programming Class": {
-            "description": "Learn programming fundamentals and build software projects",
-            "schedule": "Tuesdays and Thursdays, 3:30 PM - 4:30 PM",
-            "max_participants": 20,
-            "participants": ["emma@mergington.edu", "sophia@mergington.edu"]
-        },
-        "Gym Class": {
-            "description": "Physical education and sports activities",
-            "schedule": "Mondays, Wednesdays, Fridays, 2:00 PM - 3:00 PM",
-            "max_participants": 30,
-            "participants": ["john@mergington.edu", "olivia@mergington.edu"]
-        },
-        "Soccer Team": {
-            "description": "Join the school soccer team and compete in matches",
-            "schedule": "Wednesdays, 4:00 PM - 6:00 PM",
-            "max_participants": 22,
-            "participants": ["lucas@mergington.edu", "mia@mergington.edu"]
-        },
-        "Basketball Club": {
-            "description": "Practice basketball skills and play friendly games",
-            "schedule": "Thursdays, 3:30 PM - 5:30 PM",
-            "max_participants": 15,
-            "participants": ["liam@mergington.edu", "ava@mergington.edu"]
-        },
-        "Art Workshop": {
-            "description": "Explore painting, drawing, and sculpture techniques",
-            "schedule": "Mondays, 4:00 PM - 5:30 PM",
-            "max_participants": 18,
-            "participants": ["ella@mergington.edu", "noah@mergington.edu"]
-        },
-        "Drama Club": {
-            "description": "Act, direct, and produce school plays and performances",
-            "schedule": "Fridays, 3:30 PM - 5:30 PM",
-            "max_participants": 25,
-            "participants": ["jack@mergington.edu", "grace@mergington.edu"]
-        },
-        "Math Olympiad": {
-            "description": "Prepare for math competitions and solve challenging problems",
-            "schedule": "Tuesdays, 4:00 PM - 5:00 PM",
-            "max_participants": 16,
-            "participants": ["harry@mergington.edu", "chloe@mergington.edu"]
-        },
-        "Science Club": {
-            "description": "Conduct experiments and explore scientific concepts",
-            "schedule": "Wednesdays, 3:30 PM - 5:00 PM",
-            "max_participants": 20,
-            "participants": ["ben@mergington.edu", "zoe@mergington.edu"]
-        }
-    }
-    
+    """Roll back participant changes made during a test."""
+    # Only the participants lists are ever mutated by the API, so snapshot
+    # just those instead of deep-copying the whole activities dict.
+    snapshot = {name: tuple(data["participants"])
+                for name, data in activities.items()}
+
     yield
-    
-    # Reset activities to original state after test
-    activities.clear()
-    activities.update(original_activities)
+
+    # Restore only the lists that actually changed
+    for name, original in snapshot.items():
+        participants = activities[name]["participants"]
+        if tuple(participants) != original:
+            participants[:] = original
 
 
 @pytest.fixture
@@ -89,4 +91,4 @@ def sample_activity():
         "schedule": "Test schedule",
         "max_participants": 5,
         "participants": ["test1@mergington.edu", "test2@mergington.edu"]
-    }
\ No newline at end of file
+    }
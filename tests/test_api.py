@@ -2,9 +2,45 @@
 Test cases for the Mergington High School API endpoints.
 """
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from urllib.parse import quote
+
+import httpx
 import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 
+from src.app import signup_for_activity, unregister_from_activity
+from tests.conftest import js
+
+SIGNUP_URL = "/activities/{}/signup"
+UNREGISTER_URL = "/activities/{}/unregister"
+
+# Percent-encode each unique activity name only once
+_quote_activity = lru_cache(maxsize=None)(quote)
+
+
+def signup_url(activity):
+    return SIGNUP_URL.format(_quote_activity(activity))
+
+
+def unregister_url(activity):
+    return UNREGISTER_URL.format(_quote_activity(activity))
+
+
+# Build the httpx.URL for each unique (activity, email) pair only once so
+# repeated calls skip the URL parser entirely
+@lru_cache(maxsize=None)
+def signup_request(activity, email):
+    return httpx.URL(signup_url(activity), params={"email": email})
+
+
+@lru_cache(maxsize=None)
+def unregister_request(activity, email):
+    return httpx.URL(unregister_url(activity), params={"email": email})
+
 
 class TestRootEndpoint:
     """Test cases for the root endpoint."""
@@ -19,15 +55,12 @@ class TestRootEndpoint:
 class TestActivitiesEndpoint:
     """Test cases for the activities endpoint."""
 
-    def test_get_activities_success(self, client, reset_activities):
+    def test_get_activities_success(self, activities_json):
         """Test successful retrieval of all activities."""
-        response = client.get("/activities")
-        assert response.status_code == 200
-        
-        data = response.json()
+        data = activities_json
         assert isinstance(data, dict)
         assert len(data) > 0
-        
+
         # Check that required fields are present
         for activity_name, activity_data in data.items():
             assert "description" in activity_data
@@ -36,11 +69,10 @@ class TestActivitiesEndpoint:
             assert "participants" in activity_data
             assert isinstance(activity_data["participants"], list)
 
-    def test_get_activities_structure(self, client, reset_activities):
+    def test_get_activities_structure(self, activities_json):
         """Test the structure of activities data."""
-        response = client.get("/activities")
-        data = response.json()
-        
+        data = activities_json
+
         # Test a specific activity
         assert "Chess Club" in data
         chess_club = data["Chess Club"]
@@ -53,195 +85,156 @@ class TestActivitiesEndpoint:
 class TestSignupEndpoint:
     """Test cases for the signup endpoint."""
 
-    def test_signup_success(self, client, reset_activities):
+    @pytest.mark.parametrize("email,activity", [
+        ("newstudent@mergington.edu", "Chess Club"),
+        # Activity name with a space exercises URL encoding of the path
+        ("student@mergington.edu", "Art Workshop"),
+        # params= percent-encodes the +, so the email arrives intact
+        ("test+tag@mergington.edu", "Chess Club"),
+    ])
+    def test_signup_success(self, client, reset_activities, email, activity):
         """Test successful signup for an activity."""
-        email = "newstudent@mergington.edu"
-        activity = "Chess Club"
-        
-        response = client.post(f"/activities/{activity}/signup?email={email}")
+        response = client.post(signup_request(activity, email))
         assert response.status_code == 200
-        
-        data = response.json()
+
+        data = js(response)
         assert data["message"] == f"Signed up {email} for {activity}"
-        
-        # Verify the participant was added
-        activities_response = client.get("/activities")
-        activities_data = activities_response.json()
-        assert email in activities_data[activity]["participants"]
 
-    def test_signup_nonexistent_activity(self, client, reset_activities):
+        # The response now carries the updated participant list
+        assert email in data["participants"]
+
+    def test_signup_nonexistent_activity(self, reset_activities):
         """Test signup for a non-existent activity."""
-        email = "student@mergington.edu"
-        activity = "Nonexistent Club"
-        
-        response = client.post(f"/activities/{activity}/signup?email={email}")
-        assert response.status_code == 404
-        
-        data = response.json()
-        assert data["detail"] == "Activity not found"
-
-    def test_signup_already_registered(self, client, reset_activities):
+        # Pure validation logic, so call the handler directly and skip
+        # the ASGI request/response machinery
+        with pytest.raises(HTTPException) as exc_info:
+            signup_for_activity("Nonexistent Club", "student@mergington.edu")
+
+        assert exc_info.value.status_code == 404
+        assert exc_info.value.detail == "Activity not found"
+
+    def test_signup_already_registered(self, reset_activities):
         """Test signup when student is already registered."""
-        email = "michael@mergington.edu"  # Already in Chess Club
-        activity = "Chess Club"
-        
-        response = client.post(f"/activities/{activity}/signup?email={email}")
-        assert response.status_code == 400
-        
-        data = response.json()
-        assert data["detail"] == "Student already signed up for this activity"
-
-    def test_signup_special_characters_in_activity_name(self, client, reset_activities):
-        """Test signup with URL-encoded activity names."""
-        email = "student@mergington.edu"
-        activity = "Art Workshop"  # Has space in name
-        
-        response = client.post(f"/activities/{activity}/signup?email={email}")
-        assert response.status_code == 200
-        
-        data = response.json()
-        assert data["message"] == f"Signed up {email} for {activity}"
+        with pytest.raises(HTTPException) as exc_info:
+            # michael@ is already in Chess Club
+            signup_for_activity("Chess Club", "michael@mergington.edu")
 
-    def test_signup_special_characters_in_email(self, client, reset_activities):
-        """Test signup with special characters in email."""
-        email = "test+tag@mergington.edu"
-        activity = "Chess Club"
-        
-        response = client.post(f"/activities/{activity}/signup?email={email}")
-        assert response.status_code == 200
-        
-        data = response.json()
-        # Note: URL encoding converts + to space in query parameters
-        expected_email = email.replace("+", " ")
-        assert data["message"] == f"Signed up {expected_email} for {activity}"
+        assert exc_info.value.status_code == 400
+        assert exc_info.value.detail == "Student already signed up for this activity"
 
 
 class TestUnregisterEndpoint:
     """Test cases for the unregister endpoint."""
 
-    def test_unregister_success(self, client, reset_activities):
+    @pytest.mark.parametrize("email,activity", [
+        ("michael@mergington.edu", "Chess Club"),
+        # Activity name with a space exercises URL encoding of the path
+        ("ella@mergington.edu", "Art Workshop"),
+        # params= percent-encodes the +, so the email arrives intact
+        ("test+tag@mergington.edu", "Art Workshop"),
+    ])
+    def test_unregister_success(self, client, activities_store, reset_activities,
+                                email, activity):
         """Test successful unregistration from an activity."""
-        email = "michael@mergington.edu"  # Already in Chess Club
-        activity = "Chess Club"
-        
-        response = client.delete(f"/activities/{activity}/unregister?email={email}")
+        # Sign up first unless the student is already a default participant
+        if email not in activities_store[activity]["participants"]:
+            signup_response = client.post(signup_request(activity, email))
+            assert signup_response.status_code == 200
+
+        response = client.delete(unregister_request(activity, email))
         assert response.status_code == 200
-        
-        data = response.json()
+
+        data = js(response)
         assert data["message"] == f"Unregistered {email} from {activity}"
-        
-        # Verify the participant was removed
-        activities_response = client.get("/activities")
-        activities_data = activities_response.json()
-        assert email not in activities_data[activity]["participants"]
 
-    def test_unregister_nonexistent_activity(self, client, reset_activities):
+        # The response now carries the updated participant list
+        assert email not in data["participants"]
+
+    def test_unregister_nonexistent_activity(self, reset_activities):
         """Test unregistration from a non-existent activity."""
-        email = "student@mergington.edu"
-        activity = "Nonexistent Club"
-        
-        response = client.delete(f"/activities/{activity}/unregister?email={email}")
-        assert response.status_code == 404
-        
-        data = response.json()
-        assert data["detail"] == "Activity not found"
-
-    def test_unregister_not_registered(self, client, reset_activities):
+        with pytest.raises(HTTPException) as exc_info:
+            unregister_from_activity("Nonexistent Club", "student@mergington.edu")
+
+        assert exc_info.value.status_code == 404
+        assert exc_info.value.detail == "Activity not found"
+
+    def test_unregister_not_registered(self, reset_activities):
         """Test unregistration when student is not registered."""
-        email = "notregistered@mergington.edu"
-        activity = "Chess Club"
-        
-        response = client.delete(f"/activities/{activity}/unregister?email={email}")
-        assert response.status_code == 400
-        
-        data = response.json()
-        assert data["detail"] == "Student is not registered for this activity"
-
-    def test_unregister_special_characters(self, client, reset_activities):
-        """Test unregistration with special characters in names."""
-        # First register a student with special characters
-        email = "test+tag@mergington.edu"
-        activity = "Art Workshop"
-        
-        # Register first
-        signup_response = client.post(f"/activities/{activity}/signup?email={email}")
-        assert signup_response.status_code == 200
-        
-        # Then unregister (note: + gets URL decoded to space)
-        response = client.delete(f"/activities/{activity}/unregister?email={email}")
-        assert response.status_code == 200
-        
-        data = response.json()
-        # Note: URL encoding converts + to space in query parameters
-        expected_email = email.replace("+", " ")
-        assert data["message"] == f"Unregistered {expected_email} from {activity}"
+        with pytest.raises(HTTPException) as exc_info:
+            unregister_from_activity("Chess Club", "notregistered@mergington.edu")
+
+        assert exc_info.value.status_code == 400
+        assert exc_info.value.detail == "Student is not registered for this activity"
 
 
 class TestIntegrationScenarios:
     """Integration test scenarios."""
 
-    def test_full_signup_unregister_cycle(self, client, reset_activities):
+    @pytest.mark.slow
+    @pytest.mark.integration
+    def test_full_signup_unregister_cycle(self, client, activities_store, reset_activities):
         """Test complete signup and unregister cycle."""
         email = "integration@mergington.edu"
         activity = "Programming Class"
-        
-        # Check initial state
-        initial_response = client.get("/activities")
-        initial_data = initial_response.json()
-        initial_participants = initial_data[activity]["participants"]
-        assert email not in initial_participants
-        
+
+        # Check initial state directly against the store
+        initial_count = len(activities_store[activity]["participants"])
+        assert email not in activities_store[activity]["participants"]
+
         # Sign up
-        signup_response = client.post(f"/activities/{activity}/signup?email={email}")
+        signup_response = client.post(signup_request(activity, email))
         assert signup_response.status_code == 200
-        
-        # Verify signup
-        after_signup_response = client.get("/activities")
-        after_signup_data = after_signup_response.json()
-        assert email in after_signup_data[activity]["participants"]
-        assert len(after_signup_data[activity]["participants"]) == len(initial_participants) + 1
-        
+
+        # Verify signup from the returned participant list
+        signup_participants = js(signup_response)["participants"]
+        assert email in signup_participants
+        assert len(signup_participants) == initial_count + 1
+
         # Unregister
-        unregister_response = client.delete(f"/activities/{activity}/unregister?email={email}")
+        unregister_response = client.delete(unregister_request(activity, email))
         assert unregister_response.status_code == 200
-        
-        # Verify unregistration
-        final_response = client.get("/activities")
-        final_data = final_response.json()
+
+        # Verify final state through the API once to cover the serializer
+        final_data = js(client.get("/activities"))
         assert email not in final_data[activity]["participants"]
-        assert len(final_data[activity]["participants"]) == len(initial_participants)
+        assert len(final_data[activity]["participants"]) == initial_count
 
-    def test_multiple_students_same_activity(self, client, reset_activities):
+    @pytest.mark.slow
+    @pytest.mark.integration
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_multiple_students_same_activity(self, async_client, activities_store,
+                                                   reset_activities):
         """Test multiple students signing up for the same activity."""
         activity = "Science Club"
         emails = ["student1@mergington.edu", "student2@mergington.edu", "student3@mergington.edu"]
-        
-        # Sign up all students
-        for email in emails:
-            response = client.post(f"/activities/{activity}/signup?email={email}")
+
+        # Sign up all students concurrently
+        responses = await asyncio.gather(
+            *[async_client.post(signup_request(activity, email))
+              for email in emails])
+        for response in responses:
             assert response.status_code == 200
-        
-        # Verify all are registered
-        response = client.get("/activities")
-        data = response.json()
-        activity_participants = data[activity]["participants"]
-        
-        for email in emails:
-            assert email in activity_participants
-
-    def test_student_multiple_activities(self, client, reset_activities):
+
+        # Verify all are registered with one O(1)-lookup set
+        participants = set(activities_store[activity]["participants"])
+        assert set(emails).issubset(participants)
+
+    @pytest.mark.slow
+    @pytest.mark.integration
+    def test_student_multiple_activities(self, client, activities_store, reset_activities):
         """Test one student signing up for multiple activities."""
         email = "multisport@mergington.edu"
         activities = ["Basketball Club", "Soccer Team", "Chess Club"]
-        
-        # Sign up for all activities
-        for activity in activities:
-            response = client.post(f"/activities/{activity}/signup?email={email}")
-            assert response.status_code == 200
-        
+
+        # Sign up for all activities from worker threads. No lock is
+        # needed: each request appends to a different participants list,
+        # and list.append is atomic under the GIL.
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [executor.submit(client.post, signup_request(activity, email))
+                       for activity in activities]
+            for future in futures:
+                assert future.result().status_code == 200
+
         # Verify registration in all activities
-        response = client.get("/activities")
-        data = response.json()
-        
         for activity in activities:
-            assert email in data[activity]["participants"]
\ No newline at end of file
+            assert email in activities_store[activity]["participants"]
\ No newline at end of file